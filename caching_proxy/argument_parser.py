@@ -49,7 +49,7 @@ def set_up_arguments():
         "--cache-clean-interval",
         type=discard_negative_int,
         default=0,
-        help="Interval (in seconds) for periodic cache cleaning. Set to 0 to disable (default: 0).",
+        help="Interval (in seconds) for periodic cache cleaning. Entries older than the interval are removed. Set to 0 to disable (default: 0).",
     )
 
     parser.add_argument(
@@ -1,11 +1,22 @@
+import heapq
+import time
 from collections import OrderedDict
-from typing import Any
+from typing import Any, Hashable
 
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 
+class CacheEntry:
+    __slots__ = ("response", "hit_ttl", "expire_at")
+
+    def __init__(self, response: Any, hit_ttl: int, expire_at: float) -> None:
+        self.response = response
+        self.hit_ttl = hit_ttl
+        self.expire_at = expire_at
+
+
 class InMemoryResponseCache:
 
     def __init__(
@@ -13,59 +24,104 @@ class InMemoryResponseCache:
         cache_size_limit: int = 10,
         eviction_policy: str = "lru",
         hit_ttl: int = 10,
+        max_age: int = 0,
     ):
-        self._cache = OrderedDict()
+        self._cache: dict[Hashable, CacheEntry] = {}
+        self._expiration_heap: list[tuple[float, Hashable]] = []
         self.cache_size_limit = cache_size_limit
         self.eviction_policy = eviction_policy
         self.hit_ttl = hit_ttl
+        self.max_age = max_age
+
+    @property
+    def eviction_policy(self) -> str:
+        return self._eviction_policy
 
-    def has_cached_response(self, key: str) -> bool:
+    @eviction_policy.setter
+    def eviction_policy(self, policy: str) -> None:
+        # Only LRU needs move_to_end/popitem(last=False); a plain dict is
+        # cheaper for the other policies
+        self._eviction_policy = policy
+        if policy == "lru":
+            self._cache = OrderedDict(self._cache)
+        else:
+            self._cache = dict(self._cache)
+
+    def has_cached_response(self, key: Hashable) -> bool:
         cached_value = self._cache.get(key)
         if cached_value is None:
-            logger.debug(f"Cache miss (no entry) for key: {key}")
+            logger.debug("Cache miss (no entry) for key: %s", key)
+            return False
+        if cached_value.hit_ttl == 0:
+            logger.info("Cache expired for key: %s, removing from cache", key)
+            self.remove_from_cache(key)
             return False
-        if cached_value["HIT_TTL"] == 0:
-            logger.info(f"Cache expired for key: {key}, removing from cache")
+        # Entries can outlive max_age until the next sweep, so check on lookup
+        if self.max_age > 0 and cached_value.expire_at <= time.monotonic():
+            logger.info("Cache entry expired for key: %s, removing from cache", key)
             self.remove_from_cache(key)
             return False
-        logger.debug(f"Cache hit for key: {key} with HIT_TTL={cached_value['HIT_TTL']}")
+        logger.debug(
+            "Cache hit for key: %s with HIT_TTL=%s", key, cached_value.hit_ttl
+        )
         return True
 
-    def remove_from_cache(self, key: str):
-        logger.debug(f"Removing key from cache: {key}")
+    def remove_from_cache(self, key: Hashable):
+        logger.debug("Removing key from cache: %s", key)
         self._cache.pop(key)
 
-    def cache_response(self, key: str, response: Any):
+    def cache_response(self, key: Hashable, response: Any):
 
         if self.cache_size_limit == 0:
-            logger.debug(f"Cache size limit set to 0 (response will not be cached)")
+            logger.debug("Cache size limit set to 0 (response will not be cached)")
             return
 
         if len(self._cache) >= self.cache_size_limit:
             logger.info("Cache size limit reached; applying eviction policy")
             self.evict()
 
-        logger.info(f"Caching response for key: {key} with HIT_TTL={self.hit_ttl}")
-        self._cache[key] = {"response": response, "HIT_TTL": self.hit_ttl}
+        logger.info("Caching response for key: %s with HIT_TTL=%s", key, self.hit_ttl)
+        expire_at = time.monotonic() + self.max_age
+        self._cache[key] = CacheEntry(response, self.hit_ttl, expire_at)
+        if self.max_age > 0:
+            heapq.heappush(self._expiration_heap, (expire_at, key))
 
-    def get_cached_response(self, key: str):
+    def get_cached_response(self, key: Hashable):
         cached_value = self._cache[key]
-        cached_value["HIT_TTL"] -= 1
-        logger.debug(f"Decremented HIT_TTL for key: {key} to {cached_value['HIT_TTL']}")
-        self._cache.move_to_end(key)
+        cached_value.hit_ttl -= 1
+        logger.debug(
+            "Decremented HIT_TTL for key: %s to %s", key, cached_value.hit_ttl
+        )
+        if self.eviction_policy == "lru":
+            self._cache.move_to_end(key)
 
-        return cached_value["response"]
+        return cached_value.response
 
     def evict(self):
         match self.eviction_policy:
             case "entire":
                 logger.debug("Eviction policy: entire. Clearing entire cache.")
                 self._cache.clear()
+                self._expiration_heap.clear()
             case "lru":
                 removed_key, _ = self._cache.popitem(last=False)
-                logger.debug(f"Eviction policy: lru. Removed: {removed_key}")
+                logger.debug("Eviction policy: lru. Removed: %s", removed_key)
             case "none":
-                logger.warning(f"Eviction policy is 'none'; skipping cache update")
+                logger.warning("Eviction policy is 'none'; skipping cache update")
+
+    def purge_expired(self) -> int:
+        now = time.monotonic()
+        purged = 0
+        while self._expiration_heap and self._expiration_heap[0][0] <= now:
+            expire_at, key = heapq.heappop(self._expiration_heap)
+            cached_value = self._cache.get(key)
+            # Skip heap items left behind by entries that were removed or re-cached
+            if cached_value is None or cached_value.expire_at != expire_at:
+                continue
+            logger.debug("Cache entry expired for key: %s, removing from cache", key)
+            self._cache.pop(key)
+            purged += 1
+        return purged
 
     def get_cache_size(self) -> int:
         return len(self._cache)
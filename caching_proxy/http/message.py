@@ -1,9 +1,10 @@
-import re
 from asyncio import StreamReader
 from enum import Enum
+from functools import cached_property
 
 from utils.logger import get_logger
 
+from .parser import normalize_header_name, parse_header_block, serialize_header_block
 from .reader import AsyncHTTPStreamReader, BodyReaderType
 
 logger = get_logger(__name__)
@@ -15,101 +16,66 @@ class HTTPRequestMethod(Enum):
 
 class HTTPHeaders:
     def __init__(self, raw_header: bytes = b"") -> None:
-        self.raw = raw_header
-        self.start_line = ""
+        self._raw = raw_header
+        self._dirty = False
+        self.start_line = b""
         self.headers = self._parse_raw_headers()
 
-    def get_header(self, name: str) -> list[str] | None:
+    @property
+    def raw(self) -> bytes:
+        if self._dirty:
+            self._update_raw_bytes()
+        return self._raw
+
+    def get_header(self, name: bytes) -> list[bytes] | None:
         return self.headers.get(self._normalize_header(name))
 
-    def insert(self, name: str, values: list[str]) -> None:
+    def insert(self, name: bytes, values: list[bytes]) -> None:
         normalized_name = self._normalize_header(name)
         if self.headers.get(normalized_name) is None:
             self.headers[normalized_name] = values
         else:
             for value in values:
                 self.headers[normalized_name].append(value)
-        self._update_raw_bytes()
+        self._dirty = True
 
-    def replace(self, name: str, values: list[str]) -> bool:
+    def replace(self, name: bytes, values: list[bytes]) -> bool:
         normalized_name = self._normalize_header(name)
         if self.headers.get(normalized_name) is not None:
             self.headers[normalized_name] = values
-            self._update_raw_bytes()
+            self._dirty = True
             return True
         else:
             return False
 
-    def delete(self, name: str) -> bool:
+    def delete(self, name: bytes) -> bool:
         try:
             self.headers.pop(self._normalize_header(name))
-            self._update_raw_bytes()
+            self._dirty = True
             return True
         except KeyError:
             return False
 
     @property
-    def names(self) -> list[str]:
+    def names(self) -> list[bytes]:
         return list(self.headers.keys())
 
     def __str__(self):
         return self.raw.decode(errors="replace")
 
-    def _normalize_header(self, repr_txt: str) -> str:
-        words = repr_txt.strip().split("-")
-        words = [word.lower() for word in words]
-        return "_".join(words)
-
-    def _format_header(self, norm_txt: str) -> str:
-        words = norm_txt.split("_")
-        words = [word.capitalize() for word in words]
-        return "-".join(words)
-
-    def _decode_header_bytes(self, raw: bytes) -> str:
-        return raw.decode("utf-8", errors="replace")
-
-    def _split_header_lines(self, decoded: str) -> list[str]:
-        return decoded.replace("\r\n", "\n").split("\n")
-
-    def _unfold_lines(self, lines: list[str]) -> list[str]:
-        unfolded: list[str] = []
-        for line in lines:
-            if line.strip() == "":
-                continue
-            if line.startswith(" ") or line.startswith("\t"):
-                unfolded[-1] += " " + line.strip()
-            else:
-                unfolded.append(line)
-        return unfolded
-
-    def _parse_header_lines(self, lines: list[str]) -> tuple[str, dict[str, list[str]]]:
-        start_line = lines[0]
-        headers: dict[str, list[str]] = {}
-        for line in lines[1:]:
-            pattern = r"([\w\-]+):\s*(.*)"
-            pattern_match = re.search(pattern, line)
-            if pattern_match:
-                name, value = pattern_match.groups()
-                name = self._normalize_header(name)
-                value = value.strip()
-                headers.setdefault(name, []).append(value)
-        return start_line, headers
-
-    def _parse_raw_headers(self) -> dict[str, list[str]]:
-        decoded = self._decode_header_bytes(self.raw)
-        lines = self._split_header_lines(decoded)
-        unfolded = self._unfold_lines(lines)
-        self.start_line, headers = self._parse_header_lines(unfolded)
+    def _normalize_header(self, repr_txt: bytes) -> bytes:
+        return normalize_header_name(repr_txt)
+
+    def _parse_raw_headers(self) -> dict[bytes, list[bytes]]:
+        self.start_line, fields = parse_header_block(self._raw)
+        headers: dict[bytes, list[bytes]] = {}
+        for name, value in fields:
+            headers.setdefault(name, []).append(value)
         return headers
 
     def _update_raw_bytes(self):
-        headers = [self.start_line + "\r\n"]
-        for name, values in self.headers.items():
-            for value in values:
-                headers.append(self._format_header(name) + ": " + value + "\r\n")
-        headers.append("\r\n")
-        headers_raw = [header.encode("utf-8") for header in headers]
-        self.raw = b"".join(headers_raw)
+        self._raw = serialize_header_block(self.start_line, self.headers)
+        self._dirty = False
 
 
 class HTTPBody:
@@ -130,10 +96,10 @@ class HTTPMessage:
 
         self.body = body
 
-    def replace_header(self, name: str, value: list[str]) -> None:
+    def replace_header(self, name: bytes, value: list[bytes]) -> None:
         self.headers.replace(name, value)
 
-    def set_header(self, name: str, value: list[str]) -> None:
+    def set_header(self, name: bytes, value: list[bytes]) -> None:
         self.headers.insert(name, value)
 
     @property
@@ -145,27 +111,36 @@ class HTTPMessage:
 
 
 class HTTPRequest(HTTPMessage):
-    @property
+    # The start line is never rewritten, so its parts are computed only once
+    @cached_property
     def request_line(self):
-        return self.headers.start_line
+        return self.headers.start_line.decode("latin-1")
 
-    @property
+    @cached_property
+    def _request_line_parts(self) -> list[str]:
+        return self.request_line.split()
+
+    @cached_property
+    def raw_method(self) -> bytes:
+        return self.headers.start_line.partition(b" ")[0].upper()
+
+    @cached_property
     def method(self):
-        return self.request_line.split(" ")[0].upper()
+        return self.raw_method.decode("latin-1")
 
-    @property
+    @cached_property
     def path(self):
-        return self.request_line.split(" ")[1]
+        return self._request_line_parts[1]
 
     @property
     def address(self):
-        return self.headers.get_header("host")
+        return self.headers.get_header(b"host")
 
 
 class HTTPResponse(HTTPMessage):
     @property
     def response_line(self):
-        return self.headers.start_line
+        return self.headers.start_line.decode("latin-1")
 
 
 class DechunkedAsyncStreamMessageBuilder:
@@ -189,7 +164,7 @@ class DechunkedAsyncStreamMessageBuilder:
     async def _build_headers(self):
         logger.debug("Reading headers")
         raw_headers = await self.http_reader.read_headers()
-        logger.debug(f"Headers read ({len(raw_headers)} bytes)")
+        logger.debug("Headers read (%s bytes)", len(raw_headers))
         return HTTPHeaders(raw_headers)
 
     async def _build_body(self, headers: HTTPHeaders):
@@ -205,44 +180,32 @@ class DechunkedAsyncStreamMessageBuilder:
             return body
 
         elif content_length := self._expected_body_size(headers):
-            logger.debug(f"Expecting body of content length: {content_length}")
+            logger.debug("Expecting body of content length: %s", content_length)
             self.http_reader.body_reader_type = BodyReaderType.CONTENT_LENGTH
             self.http_reader.content_length = content_length
             body.raw = await self.http_reader.read_body()
-            logger.debug(f"Read body of size: {len(body.raw)} bytes")
+            logger.debug("Read body of size: %s bytes", len(body.raw))
             return body
 
         logger.debug("No body expected")
         return body
 
     def _expected_body_size(self, headers: HTTPHeaders):
-        content_length_header = headers.get_header("content_length")
-        logger.debug(f"Content-length header found: {content_length_header}")
+        content_length_header = headers.get_header(b"content_length")
+        logger.debug("Content-length header found: %s", content_length_header)
         return 0 if content_length_header is None else int(content_length_header[0])
 
     def _expect_chunked_body(self, headers: HTTPHeaders) -> bool:
-        chunked_header = headers.get_header("transfer_encoding")
-        logger.debug(f"Transfer-Encoding header chunked: {chunked_header}")
-        return chunked_header is not None and chunked_header[0] == "chunked"
+        chunked_header = headers.get_header(b"transfer_encoding")
+        logger.debug("Transfer-Encoding header chunked: %s", chunked_header)
+        return chunked_header is not None and chunked_header[0].lower() == b"chunked"
 
     def _dechunk_body(self, headers: HTTPHeaders, body: HTTPBody):
-        body_size = str(body.size)
-        logger.debug(f"Dechunking body, new size: {body_size}")
-        if headers.get_header("transfer_encoding"):
-            headers.delete("transfer_encoding")
-            if headers.get_header("content_length"):
-                headers.replace("content_length", [body_size])
+        body_size = str(body.size).encode()
+        logger.debug("Dechunking body, new size: %s", body_size)
+        if headers.get_header(b"transfer_encoding"):
+            headers.delete(b"transfer_encoding")
+            if headers.get_header(b"content_length"):
+                headers.replace(b"content_length", [body_size])
             else:
-                headers.insert("content_length", [body_size])
-
-
-class RawMessageBuilder:
-    async def build_request(self, raw_headers: bytes, raw_body: bytes):
-        headers = HTTPHeaders(raw_headers)
-        body = HTTPBody(raw_body)
-        return HTTPRequest(headers, body)
-
-    async def build_response(self, raw_headers: bytes, raw_body: bytes):
-        headers = HTTPHeaders(raw_headers)
-        body = HTTPBody(raw_body)
-        return HTTPResponse(headers, body)
+                headers.insert(b"content_length", [body_size])
@@ -0,0 +1,206 @@
+from enum import Enum
+from functools import lru_cache
+
+CRLF = b"\r\n"
+# Longest chunk size or trailer line accepted before giving up on the message
+MAX_CHUNK_LINE = 4096
+
+_NORMALIZE_TABLE = bytes.maketrans(
+    b"-ABCDEFGHIJKLMNOPQRSTUVWXYZ", b"_abcdefghijklmnopqrstuvwxyz"
+)
+_FORMAT_TABLE = bytes.maketrans(b"_", b"-")
+# RFC 9110 token characters; a field name made only of these translates to b""
+_TOKEN_CHARS = (
+    b"!#$%&'*+-.^_`|~0123456789"
+    b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+)
+_HEX_DIGITS = b"0123456789ABCDEFabcdef"
+
+
+_COMMON_HEADER_NAMES = (
+    b"host",
+    b"connection",
+    b"content_length",
+    b"content_type",
+    b"transfer_encoding",
+    b"x_cached_by_proxy",
+)
+
+
+# The same few header names are seen on every message, so both directions
+# are memoized
+@lru_cache(maxsize=256)
+def normalize_header_name(name: bytes) -> bytes:
+    return name.strip().translate(_NORMALIZE_TABLE)
+
+
+@lru_cache(maxsize=256)
+def format_header_name(name: bytes) -> bytes:
+    return name.translate(_FORMAT_TABLE).title()
+
+
+def _warm_header_cache() -> None:
+    for name in _COMMON_HEADER_NAMES:
+        normalize_header_name(format_header_name(name))
+        normalize_header_name(name)
+
+
+_warm_header_cache()
+
+
+def parse_header_block(raw: bytes) -> tuple[bytes, list[tuple[bytes, bytes]]]:
+    # Single pass over the lines: unfolds continuation lines and collects
+    # (normalized name, value) pairs without per-line method dispatch
+    start_line = b""
+    fields: list[tuple[bytes, bytes]] = []
+    # Lines end in CRLF (bare LF is tolerated). A lone CR is not a line break
+    # and is replaced with SP, as RFC 9112 allows, so it can not smuggle a
+    # header into the block.
+    lines = raw.replace(CRLF, b"\n").replace(b"\r", b" ").split(b"\n")
+    for index in range(len(lines)):
+        line = lines[index]
+        if not line or line.isspace():
+            continue
+        if not start_line:
+            start_line = line
+            continue
+        if line[0] in b" \t":
+            if fields:
+                name, value = fields[-1]
+                fields[-1] = (name, (value + b" " + line.strip()).strip())
+            continue
+        colon = line.find(b":")
+        if colon <= 0:
+            continue
+        name = line[:colon]
+        if name.translate(None, _TOKEN_CHARS):
+            continue
+        fields.append((normalize_header_name(name), line[colon + 1 :].strip()))
+    return start_line, fields
+
+
+def serialize_header_block(
+    start_line: bytes, headers: dict[bytes, list[bytes]]
+) -> bytes:
+    lines = [start_line]
+    for name, values in headers.items():
+        formatted_name = format_header_name(name)
+        for value in values:
+            lines.append(formatted_name + b": " + value)
+    lines.append(b"")
+    lines.append(b"")
+    return CRLF.join(lines)
+
+
+class ChunkedDecoderState(Enum):
+    SIZE = 1
+    DATA = 2
+    DATA_END = 3
+    TRAILER = 4
+    DONE = 5
+
+
+class ChunkedDecoder:
+    """Incremental decoder for chunked transfer coding.
+
+    Data can be fed in pieces of any size; feed() returns True once the
+    terminating chunk and trailer section have been consumed. Bytes received
+    after the end of the message are kept in unused_data.
+    """
+
+    def __init__(self) -> None:
+        self.body = bytearray()
+        self.unused_data = b""
+        self._buffer = bytearray()
+        self._state = ChunkedDecoderState.SIZE
+        self._remaining = 0
+        # Where the next CRLF search resumes, so a partial line is not
+        # re-scanned on every feed
+        self._search_from = 0
+
+    @property
+    def done(self) -> bool:
+        return self._state is ChunkedDecoderState.DONE
+
+    def feed(self, data: bytes) -> bool:
+        buffer = self._buffer
+        buffer.extend(data)
+        pos = 0
+        while True:
+            state = self._state
+            if state is ChunkedDecoderState.SIZE:
+                end = self._find_line_end(buffer, pos)
+                if end == -1:
+                    break
+                # Ignore optional chunk extensions after ";"
+                semicolon = buffer.find(b";", pos, end)
+                size = self._parse_chunk_size(
+                    buffer[pos : end if semicolon == -1 else semicolon],
+                    has_extensions=semicolon != -1,
+                )
+                pos = end + len(CRLF)
+                if size == 0:
+                    self._state = ChunkedDecoderState.TRAILER
+                else:
+                    self._remaining = size
+                    self._state = ChunkedDecoderState.DATA
+            elif state is ChunkedDecoderState.DATA:
+                available = min(self._remaining, len(buffer) - pos)
+                if available == 0:
+                    break
+                # Copy straight from a view instead of slicing the buffer;
+                # the view is released before the buffer is resized below
+                with memoryview(buffer)[pos : pos + available] as chunk:
+                    self.body += chunk
+                pos += available
+                self._remaining -= available
+                if self._remaining == 0:
+                    self._state = ChunkedDecoderState.DATA_END
+            elif state is ChunkedDecoderState.DATA_END:
+                if len(buffer) - pos < len(CRLF):
+                    break
+                if buffer[pos : pos + len(CRLF)] != CRLF:
+                    raise ValueError("Chunk data is not terminated by CRLF")
+                pos += len(CRLF)
+                self._state = ChunkedDecoderState.SIZE
+            elif state is ChunkedDecoderState.TRAILER:
+                end = self._find_line_end(buffer, pos)
+                if end == -1:
+                    break
+                # Trailer headers are ignored for now
+                if end == pos:
+                    self._state = ChunkedDecoderState.DONE
+                pos = end + len(CRLF)
+            else:
+                break
+
+        del buffer[:pos]
+        self._search_from = max(0, self._search_from - pos)
+        if self.done:
+            self.unused_data = bytes(buffer)
+            buffer.clear()
+        return self.done
+
+    def _parse_chunk_size(self, size_field: bytes, has_extensions: bool) -> int:
+        # int() also accepts signs, "0x", underscores and surrounding spaces;
+        # lenient framing would let a body be re-framed differently than the
+        # peer sent it, so only hex digits are allowed
+        if has_extensions:
+            # Whitespace is allowed before the ";" of a chunk extension
+            size_field = size_field.rstrip(b" \t")
+        if not size_field or size_field.translate(None, _HEX_DIGITS):
+            raise ValueError(f"Invalid chunk size: {bytes(size_field)!r}")
+        return int(size_field, 16)
+
+    def _find_line_end(self, buffer: bytearray, pos: int) -> int:
+        end = buffer.find(CRLF, max(pos, self._search_from))
+        if end != -1:
+            self._search_from = end + len(CRLF)
+            return end
+        if len(buffer) - pos > MAX_CHUNK_LINE:
+            raise ValueError(
+                f"Chunk line exceeds the size limit of {MAX_CHUNK_LINE} bytes"
+            )
+        # A CR at the very end may be the first half of the next CRLF
+        self._search_from = max(pos, len(buffer) - len(CRLF) + 1)
+        return -1
@@ -1,12 +1,16 @@
+import logging
 from abc import ABC, abstractmethod
-from asyncio import StreamReader
+from asyncio import IncompleteReadError, LimitOverrunError, StreamReader
 from enum import Enum
 
 from utils.logger import get_logger
 
+from .parser import CRLF, ChunkedDecoder
+
 logger = get_logger(__name__)
 
-CRLF = b"\r\n"
+READ_SIZE = 65536
+HEADER_SIZE_LIMIT = 65536
 
 
 class BodyReaderType(Enum):
@@ -31,14 +35,20 @@ class AsyncHTTPStreamReader(HTTPReaderStrategy):
         self.reader = reader
         self._body_reader_type = BodyReaderType.NOREAD
         self._content_length = 0
+        # Bytes read from the stream but not consumed yet. Reads are done in
+        # READ_SIZE blocks and the message is sliced out of this buffer.
+        self._buffer = bytearray()
+        # Set once any byte of the message arrives; every read starts by
+        # filling the buffer for the headers
+        self.received_data = False
 
     @property
     def body_reader_type(self) -> BodyReaderType:
-        logger.debug(f"Setting body_reader_type to {type(self._body_reader_type)}")
         return self._body_reader_type
 
     @body_reader_type.setter
     def body_reader_type(self, type: BodyReaderType) -> None:
+        logger.debug("Setting body_reader_type to %s", type)
         self._body_reader_type = type
 
     @property
@@ -47,18 +57,36 @@ class AsyncHTTPStreamReader(HTTPReaderStrategy):
 
     @content_length.setter
     def content_length(self, length: int) -> None:
-        logger.debug(f"Setting content_length to {length}")
+        logger.debug("Setting content_length to %s", length)
         self._content_length = length
 
+    @property
+    def unused_data(self) -> bytes:
+        return bytes(self._buffer)
+
     async def read_headers(self) -> bytes:
         logger.debug("Starting to read headers from stream")
         END_OF_HEADER = CRLF + CRLF
-        raw_headers = await self.reader.readuntil(END_OF_HEADER)
-        logger.debug(f"Read headers: \n{raw_headers.decode(errors='replace').strip()}")
+        searched = 0
+        while (end := self._buffer.find(END_OF_HEADER, searched)) == -1:
+            if len(self._buffer) > HEADER_SIZE_LIMIT:
+                raise LimitOverrunError(
+                    "Header section exceeds the size limit", len(self._buffer)
+                )
+            # The separator may straddle the previous and the next read
+            searched = max(0, len(self._buffer) - len(END_OF_HEADER) + 1)
+            await self._fill_buffer()
+        end += len(END_OF_HEADER)
+        raw_headers = bytes(self._buffer[:end])
+        del self._buffer[:end]
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Read headers: \n%s", raw_headers.decode(errors="replace").strip()
+            )
         return raw_headers
 
     async def read_body(self) -> bytes:
-        logger.debug(f"Reading body with reader type: {self.body_reader_type}")
+        logger.debug("Reading body with reader type: %s", self.body_reader_type)
         match self.body_reader_type:
             case BodyReaderType.NOREAD:
                 logger.debug("No body to read (NOREAD)")
@@ -66,35 +94,46 @@ class AsyncHTTPStreamReader(HTTPReaderStrategy):
             case BodyReaderType.CHUNKED:
                 logger.debug("Reading chunked body")
                 body = await self._read_chunked()
-                logger.debug(f"Finished reading chunked body of size {len(body)} bytes")
+                logger.debug(
+                    "Finished reading chunked body of size %s bytes", len(body)
+                )
                 return body
             case BodyReaderType.CONTENT_LENGTH:
-                logger.debug(f"Reading body with content_length: {self.content_length}")
+                logger.debug(
+                    "Reading body with content_length: %s", self.content_length
+                )
                 body = await self._read_exactly()
-                logger.debug(f"Finished reading body of size {len(body)} bytes")
+                logger.debug("Finished reading body of size %s bytes", len(body))
                 return body
             case _:
                 logger.warning("Unknown body reader type, returning empty body")
                 return b""
 
+    async def _fill_buffer(self) -> None:
+        data = await self.reader.read(READ_SIZE)
+        if not data:
+            raise IncompleteReadError(bytes(self._buffer), None)
+        self.received_data = True
+        self._buffer += data
+
     async def _read_chunked(self) -> bytes:
-        body = b""
-        while True:
-            size_line = await self.reader.readuntil(CRLF)
-            size = int(
-                size_line.strip().split(b";")[0], 16
-            )  # Strip and ignore optional chunk extensions
-            logger.debug(f"Chunk size: {size} bytes")
-            if size == 0:
-                logger.debug("Reached last chunk (size 0)")
-                await self.reader.readuntil(CRLF)  # Discard trailer delimiter
-                # Trailer headers are ignored for now
-                break
-            chunk = await self.reader.readexactly(size)
-            await self.reader.readuntil(CRLF)  # Discard chunk delimiter
-            body += chunk
-        return body
+        decoder = ChunkedDecoder()
+        done = decoder.feed(self._buffer)
+        self._buffer.clear()
+        while not done:
+            data = await self.reader.read(READ_SIZE)
+            if not data:
+                raise IncompleteReadError(bytes(decoder.body), None)
+            done = decoder.feed(data)
+        logger.debug("Reached last chunk (size 0)")
+        self._buffer += decoder.unused_data
+        return bytes(decoder.body)
 
     async def _read_exactly(self) -> bytes:
-        logger.debug(f"Reading exactly {self.content_length} bytes from stream")
-        return await self.reader.readexactly(self.content_length)
+        logger.debug("Reading exactly %s bytes from stream", self.content_length)
+        body = bytes(self._buffer[: self.content_length])
+        del self._buffer[: self.content_length]
+        if len(body) < self.content_length:
+            # Read the rest in one call so nothing past the body is consumed
+            body += await self.reader.readexactly(self.content_length - len(body))
+        return body
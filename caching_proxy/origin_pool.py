@@ -0,0 +1,76 @@
+import asyncio
+import time
+from asyncio import StreamReader, StreamWriter
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class OriginPool:
+    def __init__(self, max_idle_per_origin: int = 10, idle_ttl: float = 30) -> None:
+        self.max_idle_per_origin = max_idle_per_origin
+        self.idle_ttl = idle_ttl
+        self._idle: dict[
+            tuple[str, int], asyncio.Queue[tuple[StreamReader, StreamWriter, float]]
+        ] = {}
+
+    async def acquire(
+        self, host: str, port: int, ssl: bool
+    ) -> tuple[StreamReader, StreamWriter, bool]:
+        """Return a (reader, writer, reused) triple for the origin.
+
+        reused is True when the connection was taken from the pool, so the
+        caller knows the origin may have closed it while it sat idle.
+        """
+        queue = self._idle.get((host, port))
+        now = time.monotonic()
+        while queue is not None and not queue.empty():
+            reader, writer, idle_since = queue.get_nowait()
+            if self._is_usable(reader, writer, now - idle_since):
+                logger.debug("Reusing pooled connection to origin %s:%s", host, port)
+                return reader, writer, True
+            logger.debug("Dropping stale pooled connection to %s:%s", host, port)
+            writer.close()
+
+        reader, writer = await self.connect(host, port, ssl)
+        return reader, writer, False
+
+    async def connect(
+        self, host: str, port: int, ssl: bool
+    ) -> tuple[StreamReader, StreamWriter]:
+        logger.debug("Opening connection to origin %s:%s ssl=%s", host, port, ssl)
+        return await asyncio.open_connection(host, port, ssl=ssl)
+
+    def release(
+        self, host: str, port: int, reader: StreamReader, writer: StreamWriter
+    ) -> None:
+        queue = self._idle.get((host, port))
+        if queue is None:
+            queue = self._idle[(host, port)] = asyncio.Queue(
+                maxsize=self.max_idle_per_origin
+            )
+        if writer.is_closing() or queue.full():
+            writer.close()
+            return
+        queue.put_nowait((reader, writer, time.monotonic()))
+        logger.debug("Returned connection to origin %s:%s to the pool", host, port)
+
+    async def close(self) -> None:
+        writers = []
+        for queue in self._idle.values():
+            while not queue.empty():
+                _, writer, _ = queue.get_nowait()
+                writer.close()
+                writers.append(writer)
+        self._idle.clear()
+        await asyncio.gather(
+            *(writer.wait_closed() for writer in writers), return_exceptions=True
+        )
+
+    def _is_usable(
+        self, reader: StreamReader, writer: StreamWriter, idle_for: float
+    ) -> bool:
+        return (
+            idle_for < self.idle_ttl and not reader.at_eof() and not writer.is_closing()
+        )
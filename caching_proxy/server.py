@@ -1,5 +1,6 @@
 import asyncio
-from asyncio import StreamReader, StreamWriter
+from asyncio import IncompleteReadError, StreamReader, StreamWriter
+from urllib.parse import urlsplit
 
 from utils.logger import get_logger
 
@@ -8,25 +9,41 @@ from .http.message import (
     HTTPRequest,
     HTTPRequestMethod,
     HTTPResponse,
-    RawMessageBuilder,
 )
+from .origin_pool import OriginPool
 
 logger = get_logger(__name__)
 
+RAW_GET = HTTPRequestMethod.GET.value.encode()
+# Headers that only describe the proxy's own connection to the origin
+HOP_BY_HOP_HEADERS = (b"connection", b"keep_alive")
+
 
 class CachingProxyServer:
     def __init__(self, host, port, origin_url, storage) -> None:
         self.host = host
         self.port = port
         self.origin_url = origin_url
+        # The origin never changes, so it is parsed once instead of per request
+        self._origin_host, self._origin_port, self._origin_ssl = (
+            self._parse_origin_url(origin_url)
+        )
+        origin_host = self._origin_host
+        if ":" in origin_host:  # IPv6 literals are bracketed in the Host header
+            origin_host = f"[{origin_host}]"
+        self._origin_host_header = f"{origin_host}:{self._origin_port}".encode()
         self.storage = storage
+        self.origin_pool = OriginPool()
 
     async def run(self):
         server = await asyncio.start_server(self._handle_request, self.host, self.port)
 
-        async with server:
-            logger.info(f"Serving on address {self.host}:{self.port}")
-            await server.serve_forever()
+        try:
+            async with server:
+                logger.info("Serving on address %s:%s", self.host, self.port)
+                await server.serve_forever()
+        finally:
+            await self.origin_pool.close()
 
     async def _handle_request(
         self,
@@ -35,90 +52,193 @@ class CachingProxyServer:
     ) -> None:
         try:
             client_address = client_writer.get_extra_info("peername")
-            logger.info(f"New connection from {client_address}")
+            logger.info("New connection from %s", client_address)
 
             client_message_builder = DechunkedAsyncStreamMessageBuilder(client_reader)
 
-            origin_host, origin_port = self._parse_origin_host_port()
-
             request = await client_message_builder.build_request()
             logger.info(
-                f"Received request: {request.request_line} from {client_address}"
+                "Received request: %s from %s", request.request_line, client_address
             )
 
-            request.replace_header("host", [origin_host + ":" + str(origin_port)])
+            request.replace_header(b"host", [self._origin_host_header])
 
-            origin_reader, origin_writer = await self._open_connection_to_origin(
-                origin_host, origin_port
-            )
-
-            origini_message_builder = DechunkedAsyncStreamMessageBuilder(origin_reader)
+            request.headers.delete(b"connection")
+            request.set_header(b"connection", [b"keep-alive"])
 
-            if request.method != HTTPRequestMethod.GET.value:
+            if request.raw_method != RAW_GET:
                 logger.info("Request method is not GET, forwarding without caching.")
-                await self._write_request_to_origin(origin_writer, request)
-                response = await origini_message_builder.build_response()
-                response.set_header("x_cached_by_proxy", ["MISS"])
+                response = await self._fetch_from_origin(request)
+                self._prepare_response_for_client(response)
+                response.set_header(b"x_cached_by_proxy", [b"MISS"])
                 await self._write_response_to_client_and_close(client_writer, response)
                 return
 
-            cache_key = request.request_line
+            cache_key = (request.method, request.path)
             if self.storage.has_cached_response(cache_key):
-                logger.info(f"Cache HIT for key: {cache_key}")
-                raw_message_builder = RawMessageBuilder()
+                logger.info("Cache HIT for key: %s", cache_key)
                 cached_response = self.storage.get_cached_response(cache_key)
-                response = await raw_message_builder.build_response(
-                    cached_response["header"], cached_response["body"]
+                await self._write_raw_to_client_and_close(
+                    client_writer,
+                    cached_response["raw_hit_headers"],
+                    cached_response["body"],
                 )
-                response.set_header("x_cached_by_proxy", ["HIT"])
-                await self._write_response_to_client_and_close(client_writer, response)
                 return
             else:
-                logger.info(f"Cache MISS for key: {cache_key}, fetching from origin.")
-                await self._write_request_to_origin(origin_writer, request)
-                response = await origini_message_builder.build_response()
+                logger.info("Cache MISS for key: %s, fetching from origin.", cache_key)
+                response = await self._fetch_from_origin(request)
+                self._prepare_response_for_client(response)
+                # Store the serialized HIT headers and the body separately so a
+                # hit is written as-is without concatenating them
+                response.set_header(b"x_cached_by_proxy", [b"HIT"])
                 cachable_response = {
-                    "header": response.headers.raw,
+                    "raw_hit_headers": response.headers.raw,
                     "body": response.body.raw,
                 }
                 self.storage.cache_response(cache_key, cachable_response)
-                response.set_header("x_cached_by_proxy", ["MISS"])
+                response.replace_header(b"x_cached_by_proxy", [b"MISS"])
                 await self._write_response_to_client_and_close(client_writer, response)
 
         except Exception as e:
-            logger.error(f"Error handling request: {e}", exc_info=True)
+            logger.error("Error handling request: %s", e, exc_info=True)
             client_writer.close()
             await client_writer.wait_closed()
 
-    def _parse_origin_host_port(self) -> tuple[str, int]:
-        address = self.origin_url.split("//")
-        host = address[1][:-1] if address[1].endswith("/") else address[1]
-        port = 443 if address[0].startswith("https") else 80
-        logger.debug(f"Parsed origin host: {host}, port: {port}")
-        return host, port
+    def _parse_origin_url(self, origin_url: str) -> tuple[str, int, bool]:
+        address = urlsplit(origin_url)
+        if not address.hostname:
+            raise ValueError(f"Origin URL must include a scheme and host: {origin_url}")
+        ssl = address.scheme == "https"
+        port = address.port or (443 if ssl else 80)
+        logger.debug(
+            "Parsed origin host: %s, port: %s, ssl: %s", address.hostname, port, ssl
+        )
+        return address.hostname, port, ssl
 
     async def _open_connection_to_origin(
-        self, origin_host: str, origin_port: int
-    ) -> tuple[StreamReader, StreamWriter]:
-        ssl = True if origin_port == 443 else False
-        logger.debug(
-            f"Opening connection to origin {origin_host}:{origin_port} ssl={ssl}"
+        self,
+    ) -> tuple[StreamReader, StreamWriter, bool]:
+        return await self.origin_pool.acquire(
+            self._origin_host, self._origin_port, self._origin_ssl
         )
-        return await asyncio.open_connection(origin_host, origin_port, ssl=ssl)
+
+    async def _fetch_from_origin(self, request: HTTPRequest) -> HTTPResponse:
+        origin_reader, origin_writer, reused = await self._open_connection_to_origin()
+        origin_message_builder = DechunkedAsyncStreamMessageBuilder(origin_reader)
+        try:
+            return await self._exchange_with_origin(
+                request, origin_reader, origin_writer, origin_message_builder
+            )
+        except (IncompleteReadError, ConnectionError):
+            # The origin may close an idle pooled connection just as the request
+            # is sent. Retry once on a new connection if nothing was received
+            # yet and the request is safe to repeat.
+            if (
+                not reused
+                or request.raw_method != RAW_GET
+                or origin_message_builder.http_reader.received_data
+            ):
+                raise
+            logger.info("Pooled origin connection was closed, retrying")
+
+        origin_reader, origin_writer = await self.origin_pool.connect(
+            self._origin_host, self._origin_port, self._origin_ssl
+        )
+        return await self._exchange_with_origin(
+            request,
+            origin_reader,
+            origin_writer,
+            DechunkedAsyncStreamMessageBuilder(origin_reader),
+        )
+
+    async def _exchange_with_origin(
+        self,
+        request: HTTPRequest,
+        origin_reader: StreamReader,
+        origin_writer: StreamWriter,
+        origin_message_builder: DechunkedAsyncStreamMessageBuilder,
+    ) -> HTTPResponse:
+        try:
+            await self._write_request_to_origin(origin_writer, request)
+            response = await origin_message_builder.build_response()
+        except Exception:
+            origin_writer.close()
+            raise
+
+        if self._is_reusable(response, origin_message_builder):
+            self.origin_pool.release(
+                self._origin_host, self._origin_port, origin_reader, origin_writer
+            )
+        else:
+            origin_writer.close()
+        return response
+
+    def _prepare_response_for_client(self, response: HTTPResponse) -> None:
+        # The origin connection is kept alive but the client connection is
+        # closed after every response, so hop-by-hop headers from the origin
+        # must not reach the client or the cache
+        for name in self._connection_tokens(response):
+            response.headers.delete(name)
+        for name in HOP_BY_HOP_HEADERS:
+            response.headers.delete(name)
+        response.set_header(b"connection", [b"close"])
+
+    def _connection_tokens(self, response: HTTPResponse) -> list[bytes]:
+        connection = response.headers.get_header(b"connection")
+        if connection is None:
+            return []
+        return [
+            token.strip().lower()
+            for value in connection
+            for token in value.split(b",")
+            if token.strip()
+        ]
+
+    def _is_reusable(
+        self,
+        response: HTTPResponse,
+        message_builder: DechunkedAsyncStreamMessageBuilder,
+    ) -> bool:
+        # Bytes read past the end of the response would corrupt the next one
+        if message_builder.http_reader.unused_data:
+            return False
+        connection_tokens = self._connection_tokens(response)
+        if b"close" in connection_tokens:
+            return False
+        # HTTP/1.0 connections are only persistent when keep-alive is explicit
+        if (
+            response.headers.start_line.startswith(b"HTTP/1.0")
+            and b"keep-alive" not in connection_tokens
+        ):
+            return False
+        # Without a Content-Length the body end is unknown, so the stream
+        # position can not be trusted for the next request
+        return response.headers.get_header(b"content_length") is not None
 
     async def _write_request_to_origin(
         self, writer: StreamWriter, request: HTTPRequest
     ) -> None:
-        logger.debug(f"Forwarding request to origin: {request.request_line}")
-        writer.write(request.raw)
+        logger.debug("Forwarding request to origin: %s", request.request_line)
+        writer.write(request.headers.raw)
+        writer.write(request.body.raw)
         await writer.drain()
 
     async def _write_response_to_client_and_close(
         self, writer: StreamWriter, response: HTTPResponse
+    ) -> None:
+        await self._write_raw_to_client_and_close(
+            writer, response.headers.raw, response.body.raw
+        )
+
+    async def _write_raw_to_client_and_close(
+        self, writer: StreamWriter, *raw: bytes
     ) -> None:
         logger.debug("Sending response back to client")
-        writer.write(response.raw)
-        await writer.drain()
+        # Separate write() calls instead of writelines(), which joins its
+        # arguments into a new bytes object on Python 3.11. close() flushes
+        # the buffer, so no drain() is needed beforehand.
+        for data in raw:
+            writer.write(data)
         writer.close()
         await writer.wait_closed()
         logger.debug("Closed client connection")
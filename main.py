@@ -12,11 +12,11 @@ async def periodic_cache_cleaner(storage: InMemoryResponseCache, interval: int =
     logger.info(f"Periodic cache cleaner started with interval: {interval}s")
     while True:
         await asyncio.sleep(interval)
-        if storage.get_cache_size() == 0:
+        purged = storage.purge_expired()
+        if purged == 0:
             logger.info("Periodic cache cleaner: nothing to clear")
         else:
-            storage.evict()
-            logger.info("Periodic cache cleaner: cache cleared")
+            logger.info("Periodic cache cleaner: removed %s expired entries", purged)
 
 
 async def main():
@@ -36,7 +36,9 @@ async def main():
     logger.info(
         f"Initializing cache with cache size limit: {cache_size_limit}, eviction policy: {eviction_policy}, hit TTL: {hit_ttl}"
     )
-    cache = InMemoryResponseCache(cache_size_limit, eviction_policy, hit_ttl)
+    cache = InMemoryResponseCache(
+        cache_size_limit, eviction_policy, hit_ttl, cache_clean_interval
+    )
 
     logger.info(f"Starting proxy server on {host}:{port} forwarding to {origin_url}")
     server = CachingProxyServer(host, port, origin_url, cache)
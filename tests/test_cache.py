@@ -1,6 +1,7 @@
 import random
 import unittest
 from ctypes.util import test
+from unittest import mock
 
 from caching_proxy.cache.in_memory import InMemoryResponseCache
 
@@ -27,7 +28,7 @@ class TestInMemoryResponseCache(unittest.TestCase):
     def test_hit_ttl_decremetns_correctly_after_access(self):
         self.cache.cache_response(self.test_key, self.test_response)
         self.assertEqual(
-            self.cache.hit_ttl, self.cache._cache[self.test_key]["HIT_TTL"]
+            self.cache.hit_ttl, self.cache._cache[self.test_key].hit_ttl
         )
 
     def test_cache_entry_expires_after_hit_ttl_reaches_zero(self):
@@ -70,6 +71,24 @@ class TestInMemoryResponseCache(unittest.TestCase):
         self.cache.cache_response(self.test_key, self.test_response)
         self.assertEqual(self.cache.get_cache_size(), cache_size_limit)
 
+    def test_lru_eviction_policy_removes_least_recently_used(self):
+        cache_size_limit = self.cache.cache_size_limit
+        for i in range(cache_size_limit):
+            self.cache.cache_response(self.test_key + str(i), self.test_response)
+        self.cache.get_cached_response(self.test_key + "0")
+
+        self.cache.cache_response(self.test_key, self.test_response)
+        self.assertTrue(self.cache.has_cached_response(self.test_key + "0"))
+        self.assertFalse(self.cache.has_cached_response(self.test_key + "1"))
+
+    def test_changing_eviction_policy_keeps_cached_entries(self):
+        self.cache.cache_response(self.test_key, self.test_response)
+        self.cache.eviction_policy = "none"
+        self.cache.eviction_policy = "lru"
+        self.assertEqual(
+            self.test_response, self.cache.get_cached_response(self.test_key)
+        )
+
     def test_none_eviction_policy_after_cache_size_limit_reached(self):
         cache_size_limit = self.cache.cache_size_limit
         self.cache.eviction_policy = "none"
@@ -80,6 +99,42 @@ class TestInMemoryResponseCache(unittest.TestCase):
         self.cache.cache_response(self.test_key, self.test_response)
         self.assertEqual(self.cache.get_cache_size(), cache_size_limit + 1)
 
+    def test_purge_expired_removes_only_entries_older_than_max_age(self):
+        self.cache.max_age = 60
+        with mock.patch("time.monotonic", return_value=100.0):
+            self.cache.cache_response(self.test_key + "old", self.test_response)
+        with mock.patch("time.monotonic", return_value=150.0):
+            self.cache.cache_response(self.test_key + "new", self.test_response)
+        with mock.patch("time.monotonic", return_value=170.0):
+            self.assertEqual(self.cache.purge_expired(), 1)
+            self.assertFalse(self.cache.has_cached_response(self.test_key + "old"))
+            self.assertTrue(self.cache.has_cached_response(self.test_key + "new"))
+
+    def test_purge_expired_skips_entries_re_cached_after_expiry_was_scheduled(self):
+        self.cache.max_age = 60
+        with mock.patch("time.monotonic", return_value=100.0):
+            self.cache.cache_response(self.test_key, self.test_response)
+        with mock.patch("time.monotonic", return_value=150.0):
+            self.cache.cache_response(self.test_key, self.test_response)
+        with mock.patch("time.monotonic", return_value=170.0):
+            self.assertEqual(self.cache.purge_expired(), 0)
+            self.assertTrue(self.cache.has_cached_response(self.test_key))
+
+    def test_has_cached_response_misses_entry_older_than_max_age(self):
+        self.cache.max_age = 60
+        with mock.patch("time.monotonic", return_value=100.0):
+            self.cache.cache_response(self.test_key, self.test_response)
+        with mock.patch("time.monotonic", return_value=159.0):
+            self.assertTrue(self.cache.has_cached_response(self.test_key))
+        with mock.patch("time.monotonic", return_value=160.0):
+            self.assertFalse(self.cache.has_cached_response(self.test_key))
+        self.assertEqual(self.cache.get_cache_size(), 0)
+
+    def test_purge_expired_is_noop_when_max_age_disabled(self):
+        self.cache.cache_response(self.test_key, self.test_response)
+        self.assertEqual(self.cache.purge_expired(), 0)
+        self.assertEqual(self.cache.get_cache_size(), 1)
+
 
 if __name__ == "__main__":
     unittest.main()
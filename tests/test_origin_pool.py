@@ -0,0 +1,221 @@
+import asyncio
+import unittest
+
+from caching_proxy.cache.in_memory import InMemoryResponseCache
+from caching_proxy.http.message import (
+    DechunkedAsyncStreamMessageBuilder,
+    HTTPBody,
+    HTTPHeaders,
+    HTTPRequest,
+    HTTPResponse,
+)
+from caching_proxy.origin_pool import OriginPool
+from caching_proxy.server import CachingProxyServer
+
+RESPONSE = b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok"
+
+
+async def close_all(writers: list[asyncio.StreamWriter]) -> None:
+    for writer in writers:
+        writer.close()
+    await asyncio.gather(
+        *(writer.wait_closed() for writer in writers), return_exceptions=True
+    )
+
+
+class OriginTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.origin_writers: list[asyncio.StreamWriter] = []
+        self.origin = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.host, self.port = self.origin.sockets[0].getsockname()[:2]
+
+    async def asyncTearDown(self):
+        await close_all(self.origin_writers)
+        # Let the origin handlers see EOF before the server shuts down
+        await asyncio.sleep(0.01)
+        self.origin.close()
+        await self.origin.wait_closed()
+
+    @property
+    def connection_count(self) -> int:
+        return len(self.origin_writers)
+
+    async def _handle(self, reader, writer):
+        self.origin_writers.append(writer)
+        await reader.read()
+
+
+class TestOriginPool(OriginTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.pool = OriginPool()
+        self.client_writers: list[asyncio.StreamWriter] = []
+
+    async def asyncTearDown(self):
+        await self.pool.close()
+        await close_all(self.client_writers)
+        await super().asyncTearDown()
+
+    async def _acquire(self, port: int | None = None):
+        reader, writer, reused = await self.pool.acquire(
+            self.host, port or self.port, False
+        )
+        self.client_writers.append(writer)
+        return reader, writer, reused
+
+    async def test_reuses_released_connection(self):
+        reader, writer, reused = await self._acquire()
+        self.assertFalse(reused)
+        self.pool.release(self.host, self.port, reader, writer)
+
+        self.assertEqual(await self._acquire(), (reader, writer, True))
+
+    async def test_drops_connection_idle_past_ttl(self):
+        self.pool.idle_ttl = 0
+        reader, writer, _ = await self._acquire()
+        self.pool.release(self.host, self.port, reader, writer)
+
+        new_reader, new_writer, reused = await self._acquire()
+        self.assertFalse(reused)
+        self.assertIsNot(new_writer, writer)
+        self.assertTrue(writer.is_closing())
+
+    async def test_drops_connection_closed_by_origin(self):
+        reader, writer, _ = await self._acquire()
+        self.pool.release(self.host, self.port, reader, writer)
+        await asyncio.sleep(0)
+        self.origin_writers[0].close()
+        self.assertEqual(await reader.read(), b"")
+
+        _, _, reused = await self._acquire()
+        self.assertFalse(reused)
+        self.assertTrue(writer.is_closing())
+
+    async def test_closes_connection_released_to_full_queue(self):
+        self.pool.max_idle_per_origin = 1
+        first = await self._acquire()
+        second = await self._acquire()
+        self.pool.release(self.host, self.port, *first[:2])
+        self.pool.release(self.host, self.port, *second[:2])
+
+        self.assertFalse(first[1].is_closing())
+        self.assertTrue(second[1].is_closing())
+
+    async def test_close_empties_every_queue(self):
+        other_origin = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        other_port = other_origin.sockets[0].getsockname()[1]
+        writers = []
+        for port in (self.port, other_port):
+            reader, writer, _ = await self._acquire(port)
+            self.pool.release(self.host, port, reader, writer)
+            writers.append(writer)
+
+        await self.pool.close()
+        self.assertEqual(self.pool._idle, {})
+        self.assertTrue(all(writer.is_closing() for writer in writers))
+        other_origin.close()
+        await other_origin.wait_closed()
+
+
+class TestServerConnectionReuse(OriginTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.server = CachingProxyServer(
+            "127.0.0.1", 0, f"http://{self.host}:{self.port}", InMemoryResponseCache()
+        )
+
+    async def asyncTearDown(self):
+        await self.server.origin_pool.close()
+        await super().asyncTearDown()
+
+    async def _build(self, raw: bytes):
+        reader = asyncio.StreamReader()
+        reader.feed_data(raw)
+        builder = DechunkedAsyncStreamMessageBuilder(reader)
+        return await builder.build_response(), builder
+
+    def _is_reusable(self, response, builder) -> bool:
+        return self.server._is_reusable(response, builder)
+
+    async def test_reuses_connection_after_content_length_response(self):
+        self.assertTrue(self._is_reusable(*await self._build(RESPONSE)))
+
+    async def test_refuses_connection_close(self):
+        response, builder = await self._build(
+            b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: close\r\n\r\nok"
+        )
+        self.assertFalse(self._is_reusable(response, builder))
+
+    async def test_refuses_close_token_in_connection_list(self):
+        response, builder = await self._build(
+            b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n"
+            b"Connection: keep-alive, close\r\n\r\nok"
+        )
+        self.assertFalse(self._is_reusable(response, builder))
+
+    async def test_refuses_http_1_0_without_keep_alive(self):
+        response, builder = await self._build(
+            b"HTTP/1.0 200 OK\r\nContent-Length: 2\r\n\r\nok"
+        )
+        self.assertFalse(self._is_reusable(response, builder))
+
+    async def test_reuses_http_1_0_with_keep_alive(self):
+        response, builder = await self._build(
+            b"HTTP/1.0 200 OK\r\nContent-Length: 2\r\nConnection: Keep-Alive\r\n\r\nok"
+        )
+        self.assertTrue(self._is_reusable(response, builder))
+
+    async def test_refuses_connection_with_unused_data(self):
+        response, builder = await self._build(RESPONSE + b"HTTP/1.1")
+        self.assertFalse(self._is_reusable(response, builder))
+
+    async def test_refuses_connection_without_content_length(self):
+        response = HTTPResponse(HTTPHeaders(b"HTTP/1.1 200 OK\r\n\r\n"), HTTPBody())
+        _, builder = await self._build(RESPONSE)
+        self.assertFalse(self._is_reusable(response, builder))
+
+    async def test_strips_hop_by_hop_headers_before_responding(self):
+        response, _ = await self._build(
+            b"HTTP/1.1 200 OK\r\nConnection: keep-alive, X-Trace\r\n"
+            b"Keep-Alive: timeout=5\r\nX-Trace: 1\r\nContent-Length: 2\r\n\r\nok"
+        )
+        self.server._prepare_response_for_client(response)
+        self.assertEqual(
+            response.headers.raw,
+            b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: close\r\n\r\n",
+        )
+
+    async def test_retries_get_once_when_pooled_connection_was_closed(self):
+        requests_seen = []
+
+        async def handle(reader, writer):
+            self.origin_writers.append(writer)
+            requests_seen.append(await reader.readuntil(b"\r\n\r\n"))
+            writer.write(RESPONSE)
+            await writer.drain()
+            if len(requests_seen) == 1:
+                # Keep the connection open, then drop it once the next
+                # request arrives without answering
+                requests_seen.append(await reader.readuntil(b"\r\n\r\n"))
+                writer.close()
+                return
+            await reader.read()
+
+        self.origin.close()
+        await self.origin.wait_closed()
+        self.origin = await asyncio.start_server(handle, self.host, self.port)
+
+        request = HTTPRequest(
+            HTTPHeaders(b"GET / HTTP/1.1\r\nHost: origin\r\n\r\n"), HTTPBody()
+        )
+        for _ in range(2):
+            response = await self.server._fetch_from_origin(request)
+            self.assertEqual(response.body.raw, b"ok")
+        self.assertEqual(self.connection_count, 2)
+        # The second request reached the pooled connection and was then
+        # repeated on a new one
+        self.assertEqual(len(requests_seen), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
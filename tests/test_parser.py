@@ -0,0 +1,145 @@
+import unittest
+
+from caching_proxy.http.parser import (
+    MAX_CHUNK_LINE,
+    ChunkedDecoder,
+    parse_header_block,
+    serialize_header_block,
+)
+
+
+class TestHeaderBlock(unittest.TestCase):
+    def test_parses_start_line_and_normalized_fields(self):
+        start_line, fields = parse_header_block(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\nX-Id:  7 \r\n\r\n"
+        )
+        self.assertEqual(start_line, b"HTTP/1.1 200 OK")
+        self.assertEqual(fields, [(b"content_type", b"text/plain"), (b"x_id", b"7")])
+
+    def test_keeps_repeated_fields_in_order(self):
+        _, fields = parse_header_block(
+            b"HTTP/1.1 200 OK\r\nSet-Cookie: a=1\r\nSet-Cookie: b=2\r\n\r\n"
+        )
+        self.assertEqual(fields, [(b"set_cookie", b"a=1"), (b"set_cookie", b"b=2")])
+
+    def test_unfolds_continuation_lines(self):
+        _, fields = parse_header_block(
+            b"HTTP/1.1 200 OK\r\nX-Long: first\r\n  second\r\n\tthird\r\n\r\n"
+        )
+        self.assertEqual(fields, [(b"x_long", b"first second third")])
+
+    def test_skips_blank_lines(self):
+        start_line, fields = parse_header_block(
+            b"\r\nGET / HTTP/1.1\r\n\r\nHost: example.com\r\n\r\n"
+        )
+        self.assertEqual(start_line, b"GET / HTTP/1.1")
+        self.assertEqual(fields, [(b"host", b"example.com")])
+
+    def test_rejects_field_names_with_non_token_characters(self):
+        _, fields = parse_header_block(
+            b"GET / HTTP/1.1\r\nBad Name: x\r\nX Y : z\r\n: empty\r\nHost: a\r\n\r\n"
+        )
+        self.assertEqual(fields, [(b"host", b"a")])
+
+    def test_tolerates_bare_lf_line_endings(self):
+        _, fields = parse_header_block(b"GET / HTTP/1.1\nHost: a\nX-B: b\n\n")
+        self.assertEqual(fields, [(b"host", b"a"), (b"x_b", b"b")])
+
+    def test_does_not_split_on_bare_cr(self):
+        _, fields = parse_header_block(
+            b"HTTP/1.1 200 OK\r\nX-B: a\rTransfer-Encoding: chunked\r\n\r\n"
+        )
+        self.assertEqual(fields, [(b"x_b", b"a Transfer-Encoding: chunked")])
+
+    def test_serializes_with_crlf_and_formatted_names(self):
+        raw = serialize_header_block(
+            b"HTTP/1.1 200 OK",
+            {b"content_length": [b"3"], b"set_cookie": [b"a=1", b"b=2"]},
+        )
+        self.assertEqual(
+            raw,
+            b"HTTP/1.1 200 OK\r\nContent-Length: 3\r\n"
+            b"Set-Cookie: a=1\r\nSet-Cookie: b=2\r\n\r\n",
+        )
+
+    def test_round_trips_canonical_header_block(self):
+        raw = (
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\n"
+            b"X-Cached-By-Proxy: MISS\r\n\r\n"
+        )
+        start_line, fields = parse_header_block(raw)
+        headers: dict[bytes, list[bytes]] = {}
+        for name, value in fields:
+            headers.setdefault(name, []).append(value)
+        self.assertEqual(serialize_header_block(start_line, headers), raw)
+
+
+class TestChunkedDecoder(unittest.TestCase):
+    def setUp(self):
+        self.decoder = ChunkedDecoder()
+        self.message = b"4\r\nWiki\r\n5\r\npedia\r\n0\r\n\r\n"
+        self.body = b"Wikipedia"
+
+    def test_decodes_message_fed_at_once(self):
+        self.assertTrue(self.decoder.feed(self.message))
+        self.assertEqual(bytes(self.decoder.body), self.body)
+
+    def test_decodes_message_split_at_every_byte_boundary(self):
+        for split in range(1, len(self.message)):
+            decoder = ChunkedDecoder()
+            self.assertFalse(decoder.feed(self.message[:split]))
+            self.assertTrue(decoder.feed(self.message[split:]))
+            self.assertEqual(bytes(decoder.body), self.body)
+            self.assertEqual(decoder.unused_data, b"")
+
+    def test_decodes_message_fed_one_byte_at_a_time(self):
+        for index in range(len(self.message) - 1):
+            self.assertFalse(self.decoder.feed(self.message[index : index + 1]))
+        self.assertTrue(self.decoder.feed(self.message[-1:]))
+        self.assertEqual(bytes(self.decoder.body), self.body)
+
+    def test_ignores_chunk_extensions(self):
+        self.assertTrue(self.decoder.feed(b"4;name=value\r\nWiki\r\n0;last\r\n\r\n"))
+        self.assertEqual(bytes(self.decoder.body), b"Wiki")
+
+    def test_consumes_trailer_headers(self):
+        message = b"4\r\nWiki\r\n0\r\nX-Checksum: abc\r\nX-Other: 1\r\n\r\n"
+        self.assertTrue(self.decoder.feed(message))
+        self.assertEqual(bytes(self.decoder.body), b"Wiki")
+        self.assertEqual(self.decoder.unused_data, b"")
+
+    def test_keeps_bytes_after_terminator_in_unused_data(self):
+        self.assertTrue(self.decoder.feed(self.message + b"HTTP/1.1 200 OK"))
+        self.assertEqual(bytes(self.decoder.body), self.body)
+        self.assertEqual(self.decoder.unused_data, b"HTTP/1.1 200 OK")
+
+    def test_raises_when_chunk_data_is_not_terminated_by_crlf(self):
+        with self.assertRaises(ValueError):
+            self.decoder.feed(b"4\r\nWikiXX0\r\n\r\n")
+
+    def test_raises_on_invalid_hex_size(self):
+        with self.assertRaises(ValueError):
+            self.decoder.feed(b"zz\r\nWiki\r\n")
+
+    def test_raises_on_non_hex_digit_size_forms(self):
+        for size in (b"-2", b"+4", b"0x4", b"1_0", b" 4", b"4 ", b""):
+            with self.subTest(size=size), self.assertRaises(ValueError):
+                ChunkedDecoder().feed(size + b"\r\nWiki\r\n0\r\n\r\n")
+
+    def test_allows_whitespace_before_chunk_extension(self):
+        self.assertTrue(self.decoder.feed(b"4 ;name=value\r\nWiki\r\n0\r\n\r\n"))
+        self.assertEqual(bytes(self.decoder.body), b"Wiki")
+
+    def test_raises_when_size_line_exceeds_limit(self):
+        with self.assertRaises(ValueError):
+            for _ in range(MAX_CHUNK_LINE // 1024 + 2):
+                self.decoder.feed(b"a" * 1024)
+
+    def test_raises_when_trailer_line_exceeds_limit(self):
+        self.decoder.feed(b"0\r\n")
+        with self.assertRaises(ValueError):
+            self.decoder.feed(b"X-Trailer: " + b"a" * MAX_CHUNK_LINE)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import asyncio
+import unittest
+from asyncio import IncompleteReadError, LimitOverrunError, StreamReader
+
+from caching_proxy.http.reader import (
+    HEADER_SIZE_LIMIT,
+    AsyncHTTPStreamReader,
+    BodyReaderType,
+)
+
+
+class TestAsyncHTTPStreamReader(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.stream = StreamReader()
+        self.reader = AsyncHTTPStreamReader(self.stream)
+        self.headers = b"HTTP/1.1 200 OK\r\nContent-Length: 11\r\n\r\n"
+
+    async def test_reads_header_terminator_split_across_reads(self):
+        self.stream.feed_data(self.headers[:-1])
+        read_headers = asyncio.create_task(self.reader.read_headers())
+        await asyncio.sleep(0)
+        self.assertFalse(read_headers.done())
+
+        self.stream.feed_data(self.headers[-1:])
+        self.assertEqual(await read_headers, self.headers)
+
+    async def test_reads_content_length_body_partly_buffered(self):
+        self.stream.feed_data(self.headers + b"hello")
+        await self.reader.read_headers()
+        self.assertEqual(self.reader.unused_data, b"hello")
+
+        self.reader.body_reader_type = BodyReaderType.CONTENT_LENGTH
+        self.reader.content_length = 11
+        read_body = asyncio.create_task(self.reader.read_body())
+        await asyncio.sleep(0)
+        self.stream.feed_data(b" world")
+        self.assertEqual(await read_body, b"hello world")
+        self.assertEqual(self.reader.unused_data, b"")
+
+    async def test_reports_bytes_after_body_as_unused_data(self):
+        self.stream.feed_data(self.headers + b"hello worldEXTRA")
+        await self.reader.read_headers()
+        self.reader.body_reader_type = BodyReaderType.CONTENT_LENGTH
+        self.reader.content_length = 11
+        self.assertEqual(await self.reader.read_body(), b"hello world")
+        self.assertEqual(self.reader.unused_data, b"EXTRA")
+
+    async def test_reports_bytes_after_chunked_body_as_unused_data(self):
+        self.stream.feed_data(
+            b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+            b"4\r\nWiki\r\n0\r\n\r\nEXTRA"
+        )
+        await self.reader.read_headers()
+        self.reader.body_reader_type = BodyReaderType.CHUNKED
+        self.assertEqual(await self.reader.read_body(), b"Wiki")
+        self.assertEqual(self.reader.unused_data, b"EXTRA")
+
+    async def test_raises_when_header_section_exceeds_limit(self):
+        self.stream.feed_data(b"X" * (HEADER_SIZE_LIMIT + 2))
+        with self.assertRaises(LimitOverrunError):
+            await self.reader.read_headers()
+
+    async def test_raises_on_eof_mid_header(self):
+        self.stream.feed_data(self.headers[:10])
+        self.stream.feed_eof()
+        with self.assertRaises(IncompleteReadError) as context:
+            await self.reader.read_headers()
+        self.assertEqual(context.exception.partial, self.headers[:10])
+
+
+if __name__ == "__main__":
+    unittest.main()